@@ -9,53 +9,327 @@ Usage:
     python benchmark.py --iterations 100 --output results.csv
 """
 
+import os
+import gc
+import sys
 import time
 import json
+import math
+import numbers
+import random
+import asyncio
+import inspect
 import csv
-import statistics
+import queue
+import timeit
+import logging
+import logging.handlers
 import argparse
+import subprocess
+import operator
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Tuple, Any, Callable, Optional
+
+import numpy as np
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+# all output goes through this logger; main() hands records to a background
+# listener thread so writing to the terminal never blocks a timed loop
+logger = logging.getLogger(__name__)
+
+
+# per-iteration samples, stored struct-of-arrays (24 bytes per row) as integer
+# perf_counter_ns deltas; response_time_ns is execution only, fetch_ns the time
+# to count returned rows. Conversion to ms happens only in summarize/save_results
+RESULT_DTYPE = np.dtype([
+    ('response_time_ns', 'i8'),
+    ('rows_returned', 'i8'),
+    ('fetch_ns', 'i8'),
+])
+
+# (query id, DatabaseBenchmark method name, keyword params, description)
+QuerySpec = Tuple[str, str, Dict[str, Any], str]
+
+# used when no query configuration file is available
+DEFAULT_QUERY_SPECS: Tuple[QuerySpec, ...] = (
+    # Q1: Lookup by Variant ID (Composite Key)
+    ("Q1", "q1_variant_by_id", {"chromosome": "chr22", "position": 10736093, "ref": "A", "alt": "T"}, "Variant by ID (chr22:10736093:A:T)"),
+
+    # Q2: Lookup by Genomic Position (Exact)
+    ("Q2", "q2_variant_by_position", {"chromosome": "chr22", "position": 10736093}, "Variant by Position (chr22:10736093)"),
+
+    # Q3: Finding variant by external existing variation ID
+    ("Q3", "q3_variant_by_rsid", {"rsid": "rs1394819064"}, "Variant by rsID (rs1394819064)"),
+
+    # Q4: All Variants in a Gene (by Symbol)
+    ("Q4", "q4_variants_in_gene_all", {"gene": "BRCA1"}, "All Variants in Gene (BRCA1)"),
+
+    # Q5: All Variants in a Gene (by Symbol) return first 100
+    ("Q5", "q5_variants_in_gene_limited", {"gene": "BRCA1", "limit": 100}, "Gene Variants Limited (BRCA1, first 100)"),
+
+    # Q6: All variants in a genomic range - small range (~4kb)
+    ("Q6", "q6_range_small", {"chromosome": "chr22", "start": 10736093, "end": 10739993}, "Small Range (chr22:10736093-10739993)"),
+
+    # Q7: All variants in a genomic range - medium range (~100kb)
+    ("Q7", "q7_range_medium", {"chromosome": "chr22", "start": 10500000, "end": 10600000}, "Medium Range (chr22:10500000-10600000)"),
+
+    # Q8: All variants in a genomic range - large range (~10Mb)
+    ("Q8", "q8_range_large", {"chromosome": "chr22", "start": 10500000, "end": 20500000}, "Large Range (chr22:10500000-20500000)"),
+
+    # Q9: All variants in a Transcript
+    ("Q9", "q9_transcript_variants", {"transcript": "ENST00000615943"}, "Transcript Variants (ENST00000615943)"),
+
+    # Q10: Coding variants
+    ("Q10", "q10_coding_variants", {"consequences": ["missense_variant", "frameshift_variant", "stop_gained"]}, "Coding Variants"),
+
+    # Q11: Gene with Quality Filter
+    ("Q11", "q11_gene_with_quality", {"gene": "BRCA1", "min_quality": 30.0}, "Gene with Quality (BRCA1, Q>30)"),
+
+    # Q12: Rare Variants
+    ("Q12", "q12_gene_rare", {"gene": "BRCA1", "max_af": 0.01}, "Rare Variants (BRCA1, AF<0.01)"),
+)
+
+# CSV columns written by save_results
+FIELDNAMES = ('database', 'query_type', 'response_time_ms', 'rows_returned',
+              'cache_state', 'timestamp', 'calls_per_sample', 'fetch_ms', 'throughput_qps')
+
+# CSV columns written by save_results in --summary-only mode
+SUMMARY_FIELDNAMES = ('database', 'query_type', 'cache_state', 'timestamp',
+                      'calls_per_sample', 'iterations', 'mean_ms', 'std_ms', 'min_ms', 'max_ms', 'p50_ms', 'p95_ms', 'p99_ms',
+                      'throughput_qps')
+
+# upper bound on the percentile reservoir kept by OnlineStats
+RESERVOIR_SIZE = 10_000
+
+# failed iterations kept per batch for the post-batch error report
+ERROR_LOG_SIZE = 100
+
+# BenchmarkResult attributes that are constant across a batch
+BATCH_FIELDS = ('database', 'query_type', 'cache_state', 'started_at', 'calls_per_sample',
+                'throughput_qps')
+
+
+def percentiles(values: np.ndarray) -> Tuple[float, float, float]:
+    """Return (median, P95, P99) of a non-empty array with one np.partition
+
+    Introselect is O(n) and only places the few indices we read. P95/P99 use
+    the nearest-rank index int(n * q); the median averages the two middle
+    values for even n.
+    """
+    n = len(values)
+    mid = n // 2
+    k95 = int(n * 0.95)
+    k99 = int(n * 0.99)
+    kth = sorted({max(mid - 1, 0), mid, k95, k99})
+    part = np.partition(values, kth)
+    median = part[mid] if n % 2 else (part[mid - 1] + part[mid]) / 2
+    return median, part[k95], part[k99]
+
+
+class OnlineStats:
+    """Streaming summary of response times (in ns) in constant memory
+    
+    Mean and variance use Welford's online algorithm; percentiles come from a
+    fixed-size uniform reservoir sample (Algorithm R), so they are exact while
+    n <= reservoir_size and estimates beyond that. Size the reservoir as
+    min(iterations, RESERVOIR_SIZE) so short batches do not over-allocate.
+    """
+    
+    __slots__ = ('n', 'mean', 'M2', 'min', 'max', 'reservoir')
+    
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE):
+        self.n = 0
+        self.mean = 0.0
+        self.M2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.reservoir = np.empty(reservoir_size, dtype=np.float64)
+    
+    def push(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.M2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        
+        if self.n <= len(self.reservoir):
+            self.reservoir[self.n - 1] = x
+        else:
+            j = random.randrange(self.n)
+            if j < len(self.reservoir):
+                self.reservoir[j] = x
+    
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.M2 / (self.n - 1)) if self.n > 1 else math.nan
+    
+    def percentiles(self) -> Tuple[float, float, float]:
+        return percentiles(self.reservoir[:min(self.n, len(self.reservoir))])
 
 
 class BenchmarkResult:
-    """Store results from a single benchmark run"""
+    """Store results from one benchmark batch (one database, one query)
+    
+    Fields that are constant across the batch (including the ISO timestamp of
+    when it started) are kept once on the record; per-iteration values live in
+    `samples`, a RESULT_DTYPE structured array. In --summary-only mode
+    `samples` is None and only the streaming `stats` are kept.
     
-    def __init__(self, database: str, query_type: str, response_time: float, 
-                 rows_returned: int, cache_state: str):
+    `calls_per_sample` is the timeit batch size: when it is above 1 each
+    sample is the mean of that many back-to-back calls, not a single call.
+    `throughput_qps` is the completed queries per second of a concurrent or
+    async batch, where calls overlap; it is None for sequential batches.
+    """
+    
+    __slots__ = BATCH_FIELDS + ('samples', 'stats')
+    
+    def __init__(self, database: str, query_type: str, cache_state: str,
+                 started_at: str, samples: Optional[np.ndarray],
+                 stats: Optional[OnlineStats] = None, calls_per_sample: int = 1,
+                 throughput_qps: Optional[float] = None):
         self.database = database
         self.query_type = query_type
-        self.response_time = response_time  # milliseconds
-        self.rows_returned = rows_returned
         self.cache_state = cache_state
-        self.timestamp = datetime.now().isoformat()
+        self.started_at = started_at
+        self.calls_per_sample = calls_per_sample
+        self.throughput_qps = throughput_qps
+        self.samples = samples
+        self.stats = stats
     
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            'database': self.database,
-            'query_type': self.query_type,
-            'response_time_ms': self.response_time,
-            'rows_returned': self.rows_returned,
-            'cache_state': self.cache_state,
-            'timestamp': self.timestamp
-        }
+    def __len__(self) -> int:
+        if self.samples is None:
+            return self.stats.n
+        return len(self.samples)
+
+
+class SampleRecorder:
+    """Collect the samples of one batch and turn them into a BenchmarkResult
+    
+    Every timing loop hands its samples to record(), in time_query's
+    (execute_ns, fetch_ns, row_count) order, or to record_all() for a
+    vectorized batch; whether they are kept per iteration or streamed into
+    an OnlineStats with summary_only is decided here only. Failed iterations
+    are counted by fail(), keeping the first ERROR_LOG_SIZE for report_errors.
+    """
+    
+    __slots__ = ('stats', 'samples', 'n', 'errors', 'failed')
+    
+    def __init__(self, iterations: int, summary_only: bool = False):
+        self.stats = OnlineStats(min(iterations, RESERVOIR_SIZE)) if summary_only else None
+        self.samples = None if summary_only else np.empty(iterations, dtype=RESULT_DTYPE)
+        self.n = 0
+        self.errors = []
+        self.failed = 0
+    
+    def record(self, execute_ns: int, fetch_ns: int, row_count: int):
+        if self.stats is not None:
+            self.stats.push(execute_ns)
+        else:
+            self.samples[self.n] = (execute_ns, row_count, fetch_ns)
+        self.n += 1
+    
+    def record_all(self, execute_ns: np.ndarray, fetch_ns: int, row_count: int):
+        if self.stats is not None:
+            for x in execute_ns.tolist():
+                self.stats.push(x)
+        else:
+            batch = self.samples[self.n:self.n + len(execute_ns)]
+            batch['response_time_ns'] = execute_ns
+            batch['rows_returned'] = row_count
+            batch['fetch_ns'] = fetch_ns
+        self.n += len(execute_ns)
+    
+    def fail(self, i: int, error: BaseException):
+        self.failed += 1
+        if len(self.errors) < ERROR_LOG_SIZE:
+            self.errors.append((i, repr(error)))
+    
+    def finish(self, benchmark: 'DatabaseBenchmark', query_name: str, cache_state: str,
+               started_at: str, calls_per_sample: int = 1,
+               throughput_qps: Optional[float] = None) -> BenchmarkResult:
+        samples = None if self.samples is None else self.samples[:self.n]
+        return BenchmarkResult(benchmark.name, query_name, cache_state, started_at,
+                               samples, self.stats, calls_per_sample, throughput_qps)
 
 
 class DatabaseBenchmark:
-    """Base class for database benchmarks"""
+    """Base class for database benchmarks
     
-    def __init__(self, name: str):
+    Subclasses wrapping an async driver set `is_async = True` and implement
+    connect/disconnect and the query methods as coroutines; those run on the
+    benchmark's own event loop (`self.loop`).
+    """
+    
+    is_async = False
+    
+    def __init__(self, name: str, pool_size: int = 1):
         self.name = name
         self.client = None
+        self.pool_size = pool_size
+        self.pool = None
+        self.loop = None
     
     def connect(self):
-        """Establish database connection"""
-        raise NotImplementedError
+        """Establish database connections and fill the connection pool"""
+        if self.pool_size < 1:
+            raise ValueError(f"pool_size must be at least 1, got {self.pool_size}")
+        self.pool = queue.Queue(maxsize=self.pool_size)
+        for _ in range(self.pool_size):
+            self.pool.put(self.create_connection())
     
     def disconnect(self):
-        """Close database connection"""
+        """Close all pooled database connections"""
+        while self.pool is not None and not self.pool.empty():
+            self.close_connection(self.pool.get_nowait())
+        self.pool = None
+    
+    def create_connection(self):
+        """Open and return a single database connection"""
+        raise NotImplementedError
+    
+    def close_connection(self, conn):
+        """Close a single database connection"""
         raise NotImplementedError
     
+    def _acquire(self):
+        """Take a connection from the pool, blocking until one is free"""
+        return self.pool.get()
+    
+    def _release(self, conn):
+        """Return a connection to the pool"""
+        self.pool.put(conn)
+    
+    def resolve(self, value):
+        """Run `value` to completion on the event loop if it is awaitable"""
+        if inspect.isawaitable(value):
+            return self.loop.run_until_complete(value)
+        return value
+    
+    def flush_cache(self):
+        """Evict this database's own caches before a cold-cache iteration
+        
+        The default does nothing. Override with whatever the database offers,
+        e.g. MongoDB planCacheClear or restarting a Postgres buffer pool; may be
+        a coroutine for async benchmarks.
+        """
+        pass
+    
+    def close_loop(self):
+        """Close the event loop of an async benchmark, if one is open"""
+        if self.loop is not None:
+            self.loop.close()
+            self.loop = None
+    
     # Q1: Lookup by Variant ID (Composite Key)
     def q1_variant_by_id(self, chromosome: str, position: int, ref: str, alt: str) -> int:
         """Q1: Find variant by composite key (chr:pos:ref:alt), e.g., chr22:10736093:A:T"""
@@ -129,21 +403,34 @@ class DatabaseBenchmark:
 #     def __init__(self):
 #         super().__init__("MyDatabase")
 #     
-#     def connect(self):
-#         # Establish connection to your database
-#         # Example: self.client = my_database.connect(host="localhost", port=1234)
-#         pass
+#     def create_connection(self):
+#         # Open one connection; connect() calls this pool_size times
+#         # Example: return my_database.connect(host="localhost", port=1234)
+#         raise NotImplementedError
+#     
+#     def close_connection(self, conn):
+#         # conn.close()
+#         raise NotImplementedError
 #     
-#     def disconnect(self):
-#         # Close database connection
-#         # if self.client:
-#         #     self.client.close()
-#         pass
+#     # Drivers with their own thread-safe pool can override connect()/disconnect()
+#     # instead, e.g. self.client = pymongo.MongoClient(maxPoolSize=self.pool_size)
 #     
+#     # Query methods return either a row count (e.g. from SELECT COUNT(*)) or
+#     # the cursor/iterable itself; the benchmark counts returned rows outside
+#     # the timed call and reports that separately as fetch_ms.
+#     # A returned cursor is consumed after the method has released its
+#     # connection, so with --concurrency > 1 another worker could take that
+#     # connection mid-fetch. Pooled methods like the one below must return a
+#     # count (or fully fetched rows); return a live cursor only when the
+#     # connection is not shared, i.e. sequential runs.
 #     def q1_variant_by_id(self, chromosome: str, position: int, ref: str, alt: str) -> int:
 #         # Implement variant lookup by composite key
-#         # Example: results = self.client.query(...)
-#         # return len(results)
+#         # conn = self._acquire()
+#         # try:
+#         #     results = conn.query(...)
+#         #     return len(results)
+#         # finally:
+#         #     self._release(conn)
 #         raise NotImplementedError
 #     
 #     def q2_variant_by_position(self, chromosome: str, position: int) -> int:
@@ -151,78 +438,428 @@ class DatabaseBenchmark:
 #         raise NotImplementedError
 #     
 #     # ... implement all other query methods (q3-q12)
+#
+# Async drivers (asyncpg, motor, ...) bring their own pool; set is_async and
+# write the methods as coroutines instead:
+#
+# class MyAsyncDatabaseBenchmark(DatabaseBenchmark):
+#     is_async = True
+#     
+#     async def connect(self):
+#         # self.client = await asyncpg.create_pool(max_size=self.pool_size)
+#         raise NotImplementedError
+#     
+#     async def q1_variant_by_id(self, chromosome: str, position: int, ref: str, alt: str) -> int:
+#         # return await self.client.fetchval("SELECT COUNT(*) ...", ...)
+#         raise NotImplementedError
 # =============================================================================
 
 
-def time_query(func: Callable, *args) -> tuple:
-    """Time a query execution and return (response_time_ms, row_count)"""
-    start = time.perf_counter()
-    row_count = func(*args)
-    end = time.perf_counter()
-    response_time_ms = (end - start) * 1000
-    return response_time_ms, row_count
+def count_rows(result: Any) -> int:
+    """Row count of a query result: an integer, a DB-API cursor or any iterable
 
+    Any numbers.Integral counts as a ready-made count, including NumPy
+    integers returned by DuckDB- or pandas-backed drivers.
+    """
+    if isinstance(result, numbers.Integral):
+        return int(result)
+    # DB-API cursors report -1 (or None) when the count is unknown
+    rowcount = getattr(result, 'rowcount', -1)
+    if rowcount is not None and rowcount >= 0:
+        return rowcount
+    return sum(1 for _ in result)
 
-def run_benchmark(benchmark: DatabaseBenchmark, query_name: str, 
-                  query_func: Callable, args: tuple, iterations: int,
-                  cache_state: str) -> List[BenchmarkResult]:
-    """Run a single benchmark query multiple times"""
-    results = []
+
+class CacheController:
+    """Put a database into a cold-cache state before each cold iteration
+    
+    flush() calls the benchmark's flush_cache() hook and then drops the Linux
+    page cache (sync + vm.drop_caches=3, through `sudo -n` unless root). The
+    page-cache drop only helps when the database runs on this host; if it is
+    not permitted it is reported once and skipped from then on.
+    """
     
-    for i in range(iterations):
+    def __init__(self, benchmark: DatabaseBenchmark, drop_page_cache: bool = True):
+        self.benchmark = benchmark
+        self.drop_page_cache = drop_page_cache
+    
+    def flush(self):
+        self.benchmark.resolve(self.benchmark.flush_cache())
+        if self.drop_page_cache:
+            self._drop_page_cache()
+    
+    def _drop_page_cache(self):
+        command = ['sysctl', '-q', 'vm.drop_caches=3']
+        if os.geteuid() != 0:
+            command = ['sudo', '-n'] + command
+        os.sync()
         try:
-            response_time, row_count = time_query(query_func, *args)
-            result = BenchmarkResult(
-                database=benchmark.name,
-                query_type=query_name,
-                response_time=response_time,
-                rows_returned=row_count,
-                cache_state=cache_state
-            )
-            results.append(result)
-        except Exception as e:
-            print(f"Error in {benchmark.name} - {query_name} iteration {i+1}: {e}")
-            # Continue with remaining iterations
+            subprocess.run(command, check=True, capture_output=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"  Cannot drop the OS page cache ({e}); flushing database caches only")
+            self.drop_page_cache = False
+
+
+def time_query(func: Callable) -> tuple:
+    """Time a query execution and return (execute_ns, fetch_ns, row_count)
+
+    Only the call itself is the response time; counting the rows of a
+    returned cursor or iterable is timed separately as the fetch time.
+    """
+    start = time.perf_counter_ns()
+    result = func()
+    executed = time.perf_counter_ns()
+    row_count = count_rows(result)
+    end = time.perf_counter_ns()
+    return executed - start, end - executed, row_count
+
+
+def report_errors(benchmark: DatabaseBenchmark, query_name: str,
+                  recorder: SampleRecorder, iterations: int):
+    """Log the failed iterations of a finished batch
+
+    The timed loops only hand errors to recorder.fail(), which keeps
+    (iteration, repr(error)) for at most ERROR_LOG_SIZE of them.
+    """
+    if not recorder.failed:
+        return
+    logger.error(f"Error in {benchmark.name} - {query_name}: "
+                 f"{recorder.failed} of {iterations} iterations failed")
+    for i, error in recorder.errors:
+        logger.error(f"  iteration {i+1}: {error}")
+    if recorder.failed > len(recorder.errors):
+        logger.error(f"  ... {recorder.failed - len(recorder.errors)} more not shown")
+
+
+def finish_overlapped(benchmark: DatabaseBenchmark, query_name: str,
+                      recorder: SampleRecorder, iterations: int, concurrency: int,
+                      elapsed_s: float, cache_state: str, started_at: str) -> BenchmarkResult:
+    """Report errors and throughput of a concurrent or async batch and build its result"""
+    report_errors(benchmark, query_name, recorder, iterations)
+    throughput_qps = recorder.n / elapsed_s
+    logger.info(f"  Throughput: {throughput_qps:.1f} queries/s (concurrency {concurrency})")
+    return recorder.finish(benchmark, query_name, cache_state, started_at,
+                           throughput_qps=throughput_qps)
+
+
+def run_concurrent(benchmark: DatabaseBenchmark, query_name: str,
+                   call: Callable, iterations: int, concurrency: int,
+                   cache_state: str, started_at: str,
+                   summary_only: bool = False) -> BenchmarkResult:
+    """Dispatch iterations across `concurrency` worker threads
+
+    Every worker times its own call, so submission stays off the timing path.
+    The query methods take their connection from the benchmark's pool.
+    """
+    recorder = SampleRecorder(iterations, summary_only)
     
-    return results
+    start = time.perf_counter_ns()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = [executor.submit(time_query, call) for _ in range(iterations)]
+        for i, future in enumerate(futures):
+            try:
+                recorder.record(*future.result())
+            except Exception as e:
+                recorder.fail(i, e)
+    except BaseException:
+        # on Ctrl-C drop the queued calls; only those already running finish
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    elapsed_s = (time.perf_counter_ns() - start) / 1e9
+    
+    return finish_overlapped(benchmark, query_name, recorder, iterations, concurrency,
+                             elapsed_s, cache_state, started_at)
 
 
-def print_statistics(results: List[BenchmarkResult], query_name: str, db_name: str):
-    """Print statistical summary of benchmark results"""
-    if not results:
-        print(f"\nNo results for {db_name} - {query_name}")
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create an event loop for an async benchmark, using uvloop when installed"""
+    if uvloop is not None:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+async def run_async(benchmark: DatabaseBenchmark, query_name: str,
+                    query_func: Callable, iterations: int, concurrency: int,
+                    cache_state: str, started_at: str,
+                    summary_only: bool = False) -> BenchmarkResult:
+    """Pipeline iterations of an async query, at most `concurrency` in flight
+
+    Each coroutine times only its own request, so the recorded samples are
+    per-request latency while the reported throughput reflects the overlap.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def timed():
+        async with semaphore:
+            start = time.perf_counter_ns()
+            result = await query_func()
+            executed = time.perf_counter_ns()
+            row_count = count_rows(result)
+            end = time.perf_counter_ns()
+        return executed - start, end - executed, row_count
+    
+    start = time.perf_counter_ns()
+    outcomes = await asyncio.gather(*[timed() for _ in range(iterations)],
+                                    return_exceptions=True)
+    elapsed_s = (time.perf_counter_ns() - start) / 1e9
+    
+    recorder = SampleRecorder(iterations, summary_only)
+    for i, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            recorder.fail(i, outcome)
+        else:
+            recorder.record(*outcome)
+    
+    return finish_overlapped(benchmark, query_name, recorder, iterations, concurrency,
+                             elapsed_s, cache_state, started_at)
+
+
+def probe_query(benchmark: DatabaseBenchmark, query_name: str,
+                query_func: Callable, warmup: int) -> Optional[Tuple[int, bool]]:
+    """Run the warmup iterations plus one probe call
+
+    Returns (row_count, counts_natively), where counts_natively says the
+    query returned a plain int rather than rows to be counted. This is the
+    only place a failing query is caught, so the timed loops carry no
+    exception handling. Returns None if the query raised.
+    """
+    if warmup > 0:
+        logger.info(f"  Warmup: {warmup} iterations...")
+    try:
+        for _ in range(warmup):
+            count_rows(benchmark.resolve(query_func()))
+        result = benchmark.resolve(query_func())
+        return count_rows(result), isinstance(result, numbers.Integral)
+    except Exception as e:
+        logger.error(f"Error in {benchmark.name} - {query_name} probe: {e}; skipping batch")
+        return None
+
+
+@contextlib.contextmanager
+def queued_logging():
+    """Send this module's log records through a queue to a listener thread
+
+    The calling thread only enqueues records; formatting and the write to
+    stdout happen on the listener thread. Each worker process sets up its own.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener.start()
+    try:
+        yield
+    finally:
+        listener.stop()
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """Collect once, then keep the garbage collector off for the block"""
+    was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def pin_process(cpu: int):
+    """Pin the benchmark process to one CPU and, as root, raise its priority"""
+    if not hasattr(os, 'sched_setaffinity'):
+        logger.warning("CPU pinning is not supported on this platform, ignoring --cpu")
+        return
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        logger.warning(f"Cannot pin to CPU {cpu} ({e}), running unpinned")
         return
+    if os.geteuid() == 0:
+        os.nice(-5)
+    logger.info(f"Pinned benchmark process to CPU {cpu}")
+
+
+def run_fetching(benchmark: DatabaseBenchmark, query_name: str,
+                 query_func: Callable, iterations: int, cache_state: str,
+                 started_at: str, summary_only: bool = False) -> BenchmarkResult:
+    """Time a query that returns rows one call at a time, execute and fetch apart
+
+    A returned cursor has to be consumed after every call, so timeit batching
+    does not apply; only the call itself goes into response_time_ns.
+    """
+    recorder = SampleRecorder(iterations, summary_only)
+    for _ in range(iterations):
+        recorder.record(*time_query(query_func))
+    return recorder.finish(benchmark, query_name, cache_state, started_at)
+
+
+def run_cold(benchmark: DatabaseBenchmark, query_name: str, query_func: Callable,
+             iterations: int, cache: CacheController, started_at: str,
+             summary_only: bool = False) -> BenchmarkResult:
+    """Time a query one call at a time, flushing caches before every call
+
+    The flush runs outside the timed region. Cold runs are always sequential:
+    batching or overlapping calls would let them warm each other's caches.
+    """
+    recorder = SampleRecorder(iterations, summary_only)
+    for _ in range(iterations):
+        cache.flush()
+        with gc_paused():
+            recorder.record(*time_query(query_func))
+    return recorder.finish(benchmark, query_name, "cold", started_at)
+
+
+def run_benchmark(benchmark: DatabaseBenchmark, query_name: str, 
+                  query_func: Callable, iterations: int, cache_state: str,
+                  concurrency: int = 1, warmup: int = 0,
+                  summary_only: bool = False,
+                  cache: Optional[CacheController] = None) -> BenchmarkResult:
+    """Run a single benchmark query multiple times
+
+    Each iteration times a batch of `inner` back-to-back calls and records the
+    mean per-call time. `inner` is auto-tuned with timeit's autorange so fast
+    (sub-millisecond) queries are not dominated by timer and loop overhead;
+    slow queries end up with inner == 1. Every iteration therefore lasts at
+    least ~0.2 s, and `inner` is recorded as the result's calls_per_sample.
+    With concurrency > 1 the iterations are timed one call at a time by
+    run_concurrent instead, and async benchmarks are always pipelined by
+    run_async. The garbage collector is paused while samples are timed.
+    
+    `query_func` takes no arguments; main binds the parameters up front.
+    The query is validated by probe_query first; an error inside the timed
+    loop aborts the batch and propagates to the caller.
+    
+    Queries that return a cursor or iterable instead of a count are timed
+    per call by run_fetching, with row materialization kept out of the
+    response time and reported as the fetch time.
+    
+    With summary_only the sequential loop streams each time into an
+    OnlineStats instead of keeping per-iteration samples.
+    
+    A "cold" cache_state skips warmup and hands off to run_cold, which uses
+    `cache` to flush caches before every call.
+    """
+    started_at = datetime.now().isoformat()
+    cold = cache_state == "cold"
+    
+    probe = probe_query(benchmark, query_name, query_func, 0 if cold else warmup)
+    if probe is None:
+        samples = np.empty(0, dtype=RESULT_DTYPE)
+        return BenchmarkResult(benchmark.name, query_name, cache_state, started_at, samples)
+    
+    if cold:
+        if benchmark.is_async or concurrency > 1:
+            logger.info("  Cold-cache iterations run sequentially")
+        call = query_func
+        if benchmark.is_async:
+            call = lambda: benchmark.resolve(query_func())
+        return run_cold(benchmark, query_name, call, iterations, cache,
+                        started_at, summary_only)
+    
+    # GC pauses show up as multi-ms outliers in the tail percentiles
+    with gc_paused():
+        if benchmark.is_async:
+            return benchmark.loop.run_until_complete(
+                run_async(benchmark, query_name, query_func, iterations,
+                          concurrency, cache_state, started_at, summary_only))
+        
+        if concurrency > 1:
+            return run_concurrent(benchmark, query_name, query_func, iterations,
+                                  concurrency, cache_state, started_at, summary_only)
+        
+        row_count, counts_natively = probe
+        if not counts_natively:
+            return run_fetching(benchmark, query_name, query_func, iterations,
+                                cache_state, started_at, summary_only)
+        
+        inner, _ = timeit.Timer(query_func).autorange()
+        timer = timeit.Timer(query_func, timer=time.perf_counter_ns)
+        
+        recorder = SampleRecorder(iterations, summary_only)
+        if summary_only:
+            for _ in range(iterations):
+                recorder.record(timer.timeit(number=inner) // inner, 0, row_count)
+        else:
+            # the loop only stores raw integer batch times; the per-call division
+            # and the record fill happen afterwards as vectorized NumPy ops
+            batch_ns = np.empty(iterations, dtype=np.int64)
+            for i in range(iterations):
+                batch_ns[i] = timer.timeit(number=inner)
+            recorder.record_all(batch_ns // inner, 0, row_count)
+        return recorder.finish(benchmark, query_name, cache_state, started_at,
+                               calls_per_sample=inner)
+
+
+def summarize(result: BenchmarkResult) -> tuple:
+    """Return (n, mean, std, min, max, p50, p95, p99) of a non-empty result in ms"""
+    if result.samples is None:
+        stats = result.stats
+        p50, p95, p99 = stats.percentiles()
+        return (stats.n, stats.mean / 1e6, stats.std / 1e6, stats.min / 1e6,
+                stats.max / 1e6, p50 / 1e6, p95 / 1e6, p99 / 1e6)
     
-    times = [r.response_time for r in results]
+    # one vectorized ns -> ms conversion; all reductions run in C
+    times = result.samples['response_time_ns'] / 1e6
+    p50, p95, p99 = percentiles(times)
+    std = times.std(ddof=1) if len(times) > 1 else math.nan
+    return len(times), times.mean(), std, times.min(), times.max(), p50, p95, p99
+
+
+def print_statistics(result: BenchmarkResult, query_name: str, db_name: str):
+    """Print statistical summary of benchmark results"""
+    if not len(result):
+        logger.info(f"\nNo results for {db_name} - {query_name}")
+        return
     
-    print(f"\n{db_name} - {query_name}:")
-    print(f"  Iterations: {len(times)}")
-    print(f"  Mean: {statistics.mean(times):.2f} ms")
-    print(f"  Median: {statistics.median(times):.2f} ms")
-    print(f"  Min: {min(times):.2f} ms")
-    print(f"  Max: {max(times):.2f} ms")
-    print(f"  Std Dev: {statistics.stdev(times):.2f} ms" if len(times) > 1 else "  Std Dev: N/A")
+    n, mean, std, mn, mx, p50, p95, p99 = summarize(result)
     
-    # Calculate percentiles
-    sorted_times = sorted(times)
-    p95_idx = int(len(sorted_times) * 0.95)
-    p99_idx = int(len(sorted_times) * 0.99)
-    print(f"  P95: {sorted_times[p95_idx]:.2f} ms")
-    print(f"  P99: {sorted_times[p99_idx]:.2f} ms")
+    logger.info(f"\n{db_name} - {query_name}:")
+    logger.info(f"  Iterations: {n}")
+    if result.calls_per_sample > 1:
+        # batching averages out per-call jitter, so spread and tails are narrower
+        logger.info(f"  Calls per sample: {result.calls_per_sample} (times below are batch means)")
+    logger.info(f"  Mean: {mean:.2f} ms")
+    logger.info(f"  Median: {p50:.2f} ms")
+    logger.info(f"  Min: {mn:.2f} ms")
+    logger.info(f"  Max: {mx:.2f} ms")
+    logger.info(f"  Std Dev: {std:.2f} ms" if n > 1 else "  Std Dev: N/A")
+    logger.info(f"  P95: {p95:.2f} ms")
+    logger.info(f"  P99: {p99:.2f} ms")
 
 
-def save_results(all_results: List[BenchmarkResult], output_file: str):
-    """Save results to CSV file"""
-    with open(output_file, 'w', newline='') as f:
+def save_results(all_results: List[BenchmarkResult], output_file: str,
+                 summary_only: bool = False):
+    """Save results to CSV file, one row per iteration (or per batch with summary_only)"""
+    with open(output_file, 'w', newline='', buffering=1 << 20) as f:
         if all_results:
-            writer = csv.DictWriter(f, fieldnames=all_results[0].to_dict().keys())
-            writer.writeheader()
+            writer = csv.writer(f)
+            writer.writerow(SUMMARY_FIELDNAMES if summary_only else FIELDNAMES)
+            batch_fields = operator.attrgetter(*BATCH_FIELDS)
             for result in all_results:
-                writer.writerow(result.to_dict())
+                db, query, cache, ts, calls, qps = batch_fields(result)
+                if summary_only:
+                    if len(result):
+                        writer.writerow((db, query, cache, ts, calls, *summarize(result), qps))
+                    continue
+                # ns -> ms once per column, then tolist() converts each column
+                # in one C call; no per-row dicts
+                samples = result.samples
+                columns = zip((samples['response_time_ns'] / 1e6).tolist(),
+                              samples['rows_returned'].tolist(),
+                              (samples['fetch_ns'] / 1e6).tolist())
+                writer.writerows((db, query, rt, rc, cache, ts, calls, fetch, qps)
+                                 for rt, rc, fetch in columns)
         else:
-            print("No results to save")
+            logger.info("No results to save")
     
-    print(f"\nResults saved to {output_file}")
+    logger.info(f"\nResults saved to {output_file}")
 
 
 def load_query_config(config_file: str = 'query_config.json') -> dict:
@@ -231,16 +868,164 @@ def load_query_config(config_file: str = 'query_config.json') -> dict:
         with open(config_file, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Query configuration file '{config_file}' not found. Using default queries.")
+        logger.warning(f"Query configuration file '{config_file}' not found. Using default queries.")
         return None
     except json.JSONDecodeError as e:
-        print(f"Error parsing query configuration: {e}")
+        logger.error(f"Error parsing query configuration: {e}")
         return None
 
 
+def build_query_specs(config: dict) -> Tuple[QuerySpec, ...]:
+    """Resolve the 'queries' section of a query config into immutable specs"""
+    return tuple(
+        (query_id, query_def['method'], query_def['params'], query_def['description'])
+        for query_id, query_def in config['queries'].items()
+    )
+
+
+def specialize_query(query_id: str, method: Callable, params: Dict[str, Any]) -> Callable:
+    """Generate a zero-argument caller for `method` with `params` baked in
+
+    The bound method and every argument become default values of a compiled
+    function and are passed positionally, so a call is a handful of local
+    loads. A keyword functools.partial would copy its kwargs dict per call.
+    
+    Only parameter names declared in the method's signature are written into
+    the generated source; anything collected by a **kwargs parameter is
+    passed through as one `**_kw` dict, so config keys never become code.
+    """
+    signature = inspect.signature(method)
+    bound = signature.bind(**params)
+    namespace = {'_m': method}
+    call_args = []
+    extra = {}
+    for i, value in enumerate(bound.args):
+        namespace[f'_a{i}'] = value
+        call_args.append(f'_a{i}')
+    for i, (name, value) in enumerate(bound.kwargs.items()):
+        if name not in signature.parameters:
+            extra[name] = value
+            continue
+        namespace[f'_k{i}'] = value
+        call_args.append(f'{name}=_k{i}')
+    if extra:
+        namespace['_kw'] = extra
+        call_args.append('**_kw')
+    
+    defaults = ', '.join(f'{name}={name}' for name in namespace)
+    src = f"def call({defaults}):\n    return _m({', '.join(call_args)})\n"
+    exec(compile(src, f'<{query_id}>', 'exec'), namespace)
+    return namespace['call']
+
+
+def bind_queries(benchmark: DatabaseBenchmark,
+                 specs: Tuple[QuerySpec, ...]) -> List[Tuple[str, Callable, str]]:
+    """Bind query specs to a connected benchmark as (id, callable, description)
+
+    Each method is looked up once and specialized with its params by
+    specialize_query, so timed calls do no attribute or dict lookups. Specs
+    naming an unknown method or mismatched params are reported and skipped.
+    """
+    bound = []
+    for query_id, method_name, params, description in specs:
+        try:
+            query_func = specialize_query(query_id, getattr(benchmark, method_name), params)
+        except (AttributeError, TypeError, SyntaxError) as e:
+            logger.warning(f"Cannot bind {query_id} ({method_name}) for {benchmark.name}: {e}; skipping")
+            continue
+        bound.append((query_id, query_func, description))
+    return bound
+
+
+def benchmark_database(db_benchmark: DatabaseBenchmark, args: argparse.Namespace,
+                       queries: Tuple[QuerySpec, ...],
+                       results: Optional[List[BenchmarkResult]] = None) -> List[BenchmarkResult]:
+    """Connect to one database, run every query against it and disconnect
+
+    Each finished batch is appended to `results` straight away, so a caller
+    interrupted mid-database still keeps the batches already completed.
+    """
+    if results is None:
+        results = []
+    
+    logger.info(f"\n{'=' * 80}")
+    logger.info(f"Benchmarking: {db_benchmark.name}")
+    logger.info(f"{'=' * 80}")
+    
+    db_benchmark.pool_size = args.pool_size or args.concurrency
+    if db_benchmark.is_async:
+        db_benchmark.loop = new_event_loop()
+    try:
+        db_benchmark.resolve(db_benchmark.connect())
+        logger.info(f"Connected to {db_benchmark.name}")
+    except Exception as e:
+        logger.error(f"Failed to connect to {db_benchmark.name}: {e}")
+        db_benchmark.close_loop()
+        return results
+    
+    cache_states = ("cold", "warm") if args.cache == "both" else (args.cache,)
+    cache = CacheController(db_benchmark)
+    
+    # always disconnect, even when Ctrl-C interrupts a query
+    try:
+        for query_id, query_func, query_desc in bind_queries(db_benchmark, queries):
+            for cache_state in cache_states:
+                label = f"{query_id} [{cache_state}]" if len(cache_states) > 1 else query_id
+                logger.info(f"\nRunning {label}: {query_desc}...")
+                
+                try:
+                    result = run_benchmark(
+                        benchmark=db_benchmark,
+                        query_name=query_id,
+                        query_func=query_func,
+                        iterations=args.iterations,
+                        cache_state=cache_state,
+                        concurrency=args.concurrency,
+                        warmup=args.warmup,
+                        summary_only=args.summary_only,
+                        cache=cache
+                    )
+                except Exception as e:
+                    logger.error(f"Error in {db_benchmark.name} - {label}: {e}; batch aborted")
+                    continue
+                
+                results.append(result)
+                print_statistics(result, label, db_benchmark.name)
+    finally:
+        try:
+            db_benchmark.resolve(db_benchmark.disconnect())
+            logger.info(f"\nDisconnected from {db_benchmark.name}")
+        except Exception as e:
+            logger.error(f"Error disconnecting from {db_benchmark.name}: {e}")
+        db_benchmark.close_loop()
+    
+    return results
+
+
+def benchmark_database_worker(db_benchmark: DatabaseBenchmark, args: argparse.Namespace,
+                              queries: Tuple[QuerySpec, ...],
+                              cpu: Optional[int]) -> List[BenchmarkResult]:
+    """ProcessPoolExecutor entry point: pin to `cpu`, then benchmark one database"""
+    with queued_logging():
+        if cpu is not None:
+            pin_process(cpu)
+        return benchmark_database(db_benchmark, args, queries)
+
+
+def positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(description='Benchmark database performance for genomic variants')
-    parser.add_argument('--iterations', type=int, default=100, help='Number of iterations per query')
+    parser.add_argument('--iterations', type=int, default=100,
+                        help='Number of timed samples per query. Sequential runs size each sample '
+                             'with timeit autorange, so one sample of a fast query is a batch of '
+                             'back-to-back calls lasting ~0.2 s (see calls_per_sample)')
     parser.add_argument('--warmup', type=int, default=10, help='Number of warmup iterations')
     parser.add_argument('--output', type=str, default='benchmark_results.csv', help='Output CSV file')
     parser.add_argument('--databases', type=str, default='all', 
@@ -249,135 +1034,102 @@ def main():
                         help='Queries to run (comma-separated like "Q1,Q2,Q3" or "all")')
     parser.add_argument('--config', type=str, default='query_config.json',
                         help='Path to query configuration JSON file')
+    parser.add_argument('--concurrency', type=positive_int, default=1,
+                        help='Number of concurrent workers dispatching each query')
+    parser.add_argument('--pool-size', type=positive_int, default=None,
+                        help='Connections per database pool (defaults to --concurrency, '
+                             'must not be smaller)')
+    parser.add_argument('--summary-only', action='store_true',
+                        help='Keep streaming summary statistics instead of per-iteration rows')
+    parser.add_argument('--cache', choices=('warm', 'cold', 'both'), default='warm',
+                        help='Cache state to measure: cold flushes database and OS page caches '
+                             'before every iteration')
+    parser.add_argument('--cpu', type=int, default=None,
+                        help='Pin the benchmark process to this CPU (Linux only)')
+    parser.add_argument('--parallel-databases', action='store_true',
+                        help='Benchmark each database in its own process at the same time; '
+                             'only meaningful when the databases run on separate hosts')
     
     args = parser.parse_args()
     
-    # Initialize databases
-    databases = []
+    # a smaller pool makes workers wait on _acquire() inside the timed call
+    if args.pool_size is not None and args.pool_size < args.concurrency:
+        parser.error("--pool-size must be at least --concurrency")
     
-    # TODO: Initialize your custom database benchmark implementations here
-    # Example:
-    # from my_database_benchmark import MyDatabaseBenchmark
-    # databases.append(MyDatabaseBenchmark())
+    # sched_setaffinity rejects CPUs outside the allowed set with EINVAL
+    allowed_cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else None
+    if args.cpu is not None and allowed_cpus is not None and args.cpu not in allowed_cpus:
+        parser.error(f"--cpu must be one of the CPUs this process may run on: {allowed_cpus}")
     
-    if not databases:
-        print("No database benchmark implementations available.")
-        print("Please implement a DatabaseBenchmark subclass and add it to the databases list.")
-        return
-    
-    # Load query configuration
-    config = load_query_config(args.config)
-    
-    # Build queries from configuration
-    queries = []
-    if config and 'queries' in config:
-        for query_id, query_def in config['queries'].items():
-            method_name = query_def['method']
-            params = query_def['params']
-            description = query_def['description']
-            
-            # Create lambda function that calls the method with params
-            query_func = lambda db, m=method_name, p=params: getattr(db, m)(**p)
-            queries.append((query_id, query_func, description))
-    else:
-        # Fallback to hardcoded queries if config not found
-        print("Using default hardcoded queries...")
-        queries = [
-            # Q1: Lookup by Variant ID (Composite Key)
-            ("Q1", lambda db: db.q1_variant_by_id("chr22", 10736093, "A", "T"), "Variant by ID (chr22:10736093:A:T)"),
-            
-            # Q2: Lookup by Genomic Position (Exact)
-            ("Q2", lambda db: db.q2_variant_by_position("chr22", 10736093), "Variant by Position (chr22:10736093)"),
-            
-            # Q3: Finding variant by external existing variation ID
-            ("Q3", lambda db: db.q3_variant_by_rsid("rs1394819064"), "Variant by rsID (rs1394819064)"),
-            
-            # Q4: All Variants in a Gene (by Symbol)
-            ("Q4", lambda db: db.q4_variants_in_gene_all("BRCA1"), "All Variants in Gene (BRCA1)"),
-            
-            # Q5: All Variants in a Gene (by Symbol) return first 100
-            ("Q5", lambda db: db.q5_variants_in_gene_limited("BRCA1", 100), "Gene Variants Limited (BRCA1, first 100)"),
-            
-            # Q6: All variants in a genomic range - small range (~4kb)
-            ("Q6", lambda db: db.q6_range_small("chr22", 10736093, 10739993), "Small Range (chr22:10736093-10739993)"),
-            
-            # Q7: All variants in a genomic range - medium range (~100kb)
-            ("Q7", lambda db: db.q7_range_medium("chr22", 10500000, 10600000), "Medium Range (chr22:10500000-10600000)"),
-            
-            # Q8: All variants in a genomic range - large range (~10Mb)
-            ("Q8", lambda db: db.q8_range_large("chr22", 10500000, 20500000), "Large Range (chr22:10500000-20500000)"),
-            
-            # Q9: All variants in a Transcript
-            ("Q9", lambda db: db.q9_transcript_variants("ENST00000615943"), "Transcript Variants (ENST00000615943)"),
-            
-            # Q10: Coding variants
-            ("Q10", lambda db: db.q10_coding_variants(["missense_variant", "frameshift_variant", "stop_gained"]), "Coding Variants"),
-            
-            # Q11: Gene with Quality Filter
-            ("Q11", lambda db: db.q11_gene_with_quality("BRCA1", 30.0), "Gene with Quality (BRCA1, Q>30)"),
-            
-            # Q12: Rare Variants
-            ("Q12", lambda db: db.q12_gene_rare("BRCA1", 0.01), "Rare Variants (BRCA1, AF<0.01)"),
-        ]
-    
-    # Filter queries if specified
-    if args.queries != 'all':
-        query_filter = set(args.queries.split(','))
-        queries = [(qid, qfunc, qdesc) for qid, qfunc, qdesc in queries if qid in query_filter]
-        print(f"Running filtered queries: {query_filter}")
-    
-    all_results = []
-    
-    # Run benchmarks
-    for db_benchmark in databases:
-        print(f"\n{'=' * 80}")
-        print(f"Benchmarking: {db_benchmark.name}")
-        print(f"{'=' * 80}")
+    with queued_logging():
+        # Initialize databases
+        databases = []
         
-        try:
-            db_benchmark.connect()
-            print(f"Connected to {db_benchmark.name}")
-        except Exception as e:
-            print(f"Failed to connect to {db_benchmark.name}: {e}")
-            continue
+        # TODO: Initialize your custom database benchmark implementations here
+        # Example:
+        # from my_database_benchmark import MyDatabaseBenchmark
+        # databases.append(MyDatabaseBenchmark())
+        
+        if not databases:
+            logger.warning("No database benchmark implementations available.")
+            logger.warning("Please implement a DatabaseBenchmark subclass and add it to the databases list.")
+            return
+        
+        # Keep scheduler migrations out of the measurements; parallel workers pin themselves
+        if args.cpu is not None and not args.parallel_databases:
+            pin_process(args.cpu)
+        
+        # Load query configuration
+        config = load_query_config(args.config)
+        
+        # Build query specs from configuration; methods are bound per database
+        if config and 'queries' in config:
+            queries = build_query_specs(config)
+        else:
+            # Fallback to hardcoded queries if config not found
+            logger.info("Using default hardcoded queries...")
+            queries = DEFAULT_QUERY_SPECS
+        
+        # Filter queries if specified
+        if args.queries != 'all':
+            query_filter = set(args.queries.split(','))
+            queries = tuple(q for q in queries if q[0] in query_filter)
+            logger.info(f"Running filtered queries: {query_filter}")
         
-        for query_id, query_func, query_desc in queries:
-            print(f"\nRunning {query_id}: {query_desc}...")
-            
-            # Warmup iterations
-            if args.warmup > 0:
-                print(f"  Warmup: {args.warmup} iterations...")
-                for _ in range(args.warmup):
-                    try:
-                        query_func(db_benchmark)
-                    except Exception as e:
-                        print(f"  Warmup error: {e}")
-            
-            # Actual benchmark
-            results = run_benchmark(
-                benchmark=db_benchmark,
-                query_name=query_id,
-                query_func=lambda: query_func(db_benchmark),
-                args=(),
-                iterations=args.iterations,
-                cache_state="warm"
-            )
-            
-            all_results.extend(results)
-            print_statistics(results, query_id, db_benchmark.name)
+        all_results = []
         
+        # Run benchmarks; Ctrl-C stops early but keeps the results collected so far
         try:
-            db_benchmark.disconnect()
-            print(f"\nDisconnected from {db_benchmark.name}")
-        except Exception as e:
-            print(f"Error disconnecting from {db_benchmark.name}: {e}")
-    
-    # Save results
-    if all_results:
-        save_results(all_results, args.output)
-        print(f"\nTotal results collected: {len(all_results)}")
-    else:
-        print("\nNo results collected")
+            if args.parallel_databases and len(databases) > 1:
+                # one process per database, each on its own CPU when --cpu is given
+                with ProcessPoolExecutor(max_workers=len(databases)) as executor:
+                    futures = {}
+                    for index, db_benchmark in enumerate(databases):
+                        cpu = args.cpu
+                        if cpu is not None and allowed_cpus is not None:
+                            # rotate through the allowed CPUs (cgroups/taskset), from --cpu on
+                            first = allowed_cpus.index(args.cpu)
+                            cpu = allowed_cpus[(first + index) % len(allowed_cpus)]
+                        future = executor.submit(benchmark_database_worker, db_benchmark,
+                                                 args, queries, cpu)
+                        futures[future] = db_benchmark.name
+                    for future in as_completed(futures):
+                        try:
+                            all_results.extend(future.result())
+                        except Exception as e:
+                            logger.error(f"Benchmarking {futures[future]} failed: {e}")
+            else:
+                for db_benchmark in databases:
+                    benchmark_database(db_benchmark, args, queries, all_results)
+        except KeyboardInterrupt:
+            logger.info("\nInterrupted, saving results collected so far")
+        
+        # Save results
+        if all_results:
+            save_results(all_results, args.output, args.summary_only)
+            logger.info(f"\nTotal results collected: {sum(len(r) for r in all_results)}")
+        else:
+            logger.info("\nNo results collected")
 
 
 if __name__ == "__main__":